@@ -114,7 +114,7 @@
 
 import streamlit as st
 import pandas as pd
-import scraping, database
+import scraping, database, artifacts
 from datetime import datetime
 import json
 import os
@@ -199,11 +199,37 @@ for i, name in enumerate(website_names):
 
 st.write("---")
 
+# --- Embedding Backend ---
+b_col1, b_col2 = st.columns(2)
+with b_col1:
+    backend = st.selectbox(
+        "Embedding Backend",
+        scraping.EMBEDDING_BACKENDS,
+        help="onnx-int8 runs a quantized ONNX Runtime model, faster on CPU-only hosts."
+    )
+with b_col2:
+    num_threads = st.number_input(
+        "CPU Threads (ONNX)", min_value=0, max_value=64, value=0,
+        help="0 lets ONNX Runtime decide.",
+        disabled=backend != "onnx-int8"
+    )
+
+# The thread count only applies to ONNX; passing it for PyTorch would load a second cached model
+onnx_threads = (int(num_threads) or None) if backend == "onnx-int8" else None
+
+st.write("---")
+
 if st.button("Load Saved Products"):
     saved_df = database.load_products()
     st.dataframe(saved_df, use_container_width=True)
 
 # --- Scraping Execution ---
+run_key = artifacts.hash_inputs({name: websites[name] for name in selected_sites}, backend)
+
+@st.cache_data
+def load_run_cached(run_key, version):
+    return artifacts.load_run(run_key, version)
+
 if st.button("Start Scraping", type="primary"):
     if not selected_sites:
         st.warning("Please select at least one website.")
@@ -234,22 +260,45 @@ if st.button("Start Scraping", type="primary"):
         if df_list:
             combined_raw_df = pd.concat(df_list, ignore_index=True)
             with st.spinner("Cleaning, Categorizing, and Clustering..."):
-                final_df = scraping.clean_df(combined_raw_df)
+                final_df = artifacts.cached_clean_df(
+                    scraping.clean_df, combined_raw_df, backend, onnx_threads
+                )
                 database.save_products(final_df)
+                version = artifacts.save_run(run_key, final_df, {
+                    "sites": selected_sites,
+                    "backend": backend
+                })
+                st.session_state["run"] = (run_key, version)
                 st.success("Saved results to database")
-            
-            st.subheader("Scraped & Categorized Data")
-            # st.write(f"Total Unique Products: {len(final_df)}")
-            st.dataframe(final_df, use_container_width=True)
-            
-            st.subheader("Saved Products Database")
-            
-            csv = final_df.to_csv(index=False).encode('utf-8-sig')
+        else: 
+            st.error("No data was collected from any site.")
+
+# --- Results (persist across reruns) ---
+# Only show the session's run if it matches the current selection
+run = st.session_state.get("run")
+if not run or run[0] != run_key:
+    latest = artifacts.latest_version(run_key)
+    run = (run_key, latest) if latest else None
+
+if run:
+    final_df, manifest = load_run_cached(*run)
+
+    if final_df is not None:
+        st.subheader("Scraped & Categorized Data")
+        st.caption(
+            f"Run {manifest['run_key']} v{manifest['version']} · "
+            f"{manifest['created_at']} · {manifest['rows']} products"
+        )
+        st.dataframe(final_df, use_container_width=True)
+
+        export_format = st.selectbox("Export Format", list(artifacts.EXPORT_FORMATS))
+        extension, mime = artifacts.EXPORT_FORMATS[export_format]
+        export_path = artifacts.export_run(*run, final_df, export_format)
+
+        with open(export_path, "rb") as f:
             st.download_button(
-                label="📥 Download Categorized Data as CSV",
-                data=csv,
-                file_name=f"scraped_products_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
+                label=f"📥 Download Categorized Data as {export_format}",
+                data=f,
+                file_name=f"scraped_products_{datetime.now().strftime('%Y%m%d')}.{extension}",
+                mime=mime,
             )
-        else: 
-            st.error("No data was collected from any site.")
\ No newline at end of file
@@ -0,0 +1,180 @@
+import os
+import json
+import shutil
+import hashlib
+import pandas as pd
+
+RUNS_DIR = "st_app/runs"
+CLEAN_DIR = "st_app/runs/clean"
+
+# Bump when clean_df output changes so stale memoized results are ignored
+ARTIFACT_VERSION = 1
+EXPORT_CHUNK_SIZE = 5000
+
+# Retention caps so st_app/runs/ doesn't grow without limit
+MAX_RUN_VERSIONS = 5
+MAX_CLEAN_ENTRIES = 20
+
+# Raw columns clean_df reads or passes through; volatile ones such as
+# "Scraped at" are left out so identical products hash to the same key
+CLEAN_INPUT_COLUMNS = ["ID", "Product", "Description", "Price", "SKU", "Product URL", "Brand"]
+
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/octet-stream"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# --- Hashing ---
+
+def hash_inputs(*parts):
+    payload = json.dumps([ARTIFACT_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def hash_dataframe(df, *parts):
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    return hash_inputs(digest.hexdigest(), *parts)
+
+# --- Memoized clean_df ---
+
+def cached_clean_df(clean_fn, raw_df, *args):
+    """
+    Returns clean_fn(raw_df, *args), reusing the stored result when the
+    same raw data was already cleaned with the same arguments.
+    """
+    columns = [c for c in CLEAN_INPUT_COLUMNS if c in raw_df.columns]
+    key = hash_dataframe(raw_df[columns], *args)
+    path = os.path.join(CLEAN_DIR, f"{key}.parquet")
+
+    if os.path.exists(path):
+        os.utime(path)  # mark as recently used for pruning
+        return pd.read_parquet(path)
+
+    final_df = clean_fn(raw_df, *args)
+    os.makedirs(CLEAN_DIR, exist_ok=True)
+    final_df.to_parquet(path, index=False)
+    prune_clean_cache()
+    return final_df
+
+def prune_clean_cache(keep=MAX_CLEAN_ENTRIES):
+    entries = sorted(
+        (os.path.join(CLEAN_DIR, name) for name in os.listdir(CLEAN_DIR) if name.endswith(".parquet")),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    for path in entries[keep:]:
+        os.remove(path)
+
+# --- Versioned Run Artifacts ---
+
+def run_dir(run_key, version):
+    return os.path.join(RUNS_DIR, run_key, f"v{version}")
+
+def list_versions(run_key):
+    base = os.path.join(RUNS_DIR, run_key)
+    if not os.path.isdir(base):
+        return []
+    return sorted(
+        int(name[1:]) for name in os.listdir(base)
+        if name.startswith("v") and name[1:].isdigit()
+    )
+
+def latest_version(run_key):
+    versions = list_versions(run_key)
+    return versions[-1] if versions else 0
+
+def prune_runs(run_key, keep=MAX_RUN_VERSIONS):
+    for version in list_versions(run_key)[:-keep]:
+        shutil.rmtree(run_dir(run_key, version), ignore_errors=True)
+
+def save_run(run_key, final_df, metadata=None):
+    version = latest_version(run_key) + 1
+    path = run_dir(run_key, version)
+    os.makedirs(path, exist_ok=True)
+
+    final_df.to_parquet(os.path.join(path, "final.parquet"), index=False)
+
+    manifest = {
+        "run_key": run_key,
+        "version": version,
+        "artifact_version": ARTIFACT_VERSION,
+        "rows": len(final_df),
+        "created_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **(metadata or {})
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    prune_runs(run_key)
+    return version
+
+def load_run(run_key, version=None):
+    version = version or latest_version(run_key)
+    if not version:
+        return None, None
+
+    path = run_dir(run_key, version)
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        return None, None  # pruned
+
+    with open(os.path.join(path, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("artifact_version") != ARTIFACT_VERSION:
+        return None, None
+
+    return pd.read_parquet(os.path.join(path, "final.parquet")), manifest
+
+# --- Chunked Exports ---
+
+def _write_csv(df, path, chunk_size):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        for start in range(0, len(df), chunk_size):
+            df.iloc[start:start + chunk_size].to_csv(f, index=False, header=start == 0)
+        if df.empty:
+            df.to_csv(f, index=False)
+
+def _write_parquet(df, path, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def _write_excel(df, path, chunk_size):
+    from openpyxl import Workbook
+
+    # write_only mode streams rows to disk instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Products")
+    sheet.append(list(df.columns))
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False):
+            sheet.append(list(row))
+    workbook.save(path)
+
+EXPORT_WRITERS = {
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+    "xlsx": _write_excel,
+}
+
+def export_run(run_key, version, df, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Writes the run to disk in chunks (once per format) and returns the path.
+    """
+    extension, _ = EXPORT_FORMATS[fmt]
+    path = os.path.join(run_dir(run_key, version), f"export.{extension}")
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        EXPORT_WRITERS[extension](df, tmp_path, chunk_size)
+        os.replace(tmp_path, path)
+
+    return path
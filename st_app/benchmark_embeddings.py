@@ -0,0 +1,118 @@
+"""
+Benchmark the PyTorch and quantized ONNX embedding backends.
+
+Measures encode throughput on the saved products (or a synthetic catalog when
+the database is empty) and checks that clean_df cluster assignments agree
+within a tolerance (adjusted Rand index).
+
+Usage:
+    python st_app/benchmark_embeddings.py --threads 4 --tolerance 0.95
+"""
+import argparse
+import os
+import sys
+import time
+import random
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scraping, database
+
+
+def load_catalog(limit):
+    if os.path.exists(database.DB_PATH):
+        saved = database.load_products()
+        if not saved.empty:
+            df = saved.rename(columns={
+                "id": "ID",
+                "product": "Product",
+                "price": "Price",
+                "sku": "SKU",
+                "product_url": "Product URL",
+                "description": "Description",
+                "brand": "Brand"
+            })
+            return df.head(limit)
+    return synthetic_catalog(limit)
+
+
+def synthetic_catalog(limit, seed=0):
+    rng = random.Random(seed)
+    items = ["towel", "duvet cover", "mug", "pyjama set", "cushion", "tote bag", "baby romper", "tablecloth"]
+    adjectives = ["cotton", "linen", "soft", "organic", "printed", "striped", "classic", "luxury"]
+    colours = ["white", "blue", "grey", "beige", "green", "pink"]
+
+    rows = []
+    for i in range(limit):
+        item = rng.choice(items)
+        title = f"{rng.choice(adjectives).title()} {item.title()} - {rng.choice(colours).title()}"
+        rows.append({
+            "ID": i,
+            "Product": title,
+            "Price": rng.randint(100, 2000),
+            "SKU": f"SKU-{i}",
+            "Product URL": f"https://example.com/products/{i}",
+            "Description": f"A {rng.choice(adjectives)} {item} made in Egypt.",
+            "Brand": "example"
+        })
+    return pd.DataFrame(rows)
+
+
+def time_encode(model, texts, repeats):
+    model.encode(texts[:32], normalize_embeddings=True)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        embeddings = model.encode(texts, normalize_embeddings=True)
+    elapsed = (time.perf_counter() - start) / repeats
+    return embeddings, len(texts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.95)
+    args = parser.parse_args()
+
+    df = load_catalog(args.limit)
+    texts = list(df["Product"].astype(str) + " " + df["Description"].fillna("").astype(str))
+    print(f"Benchmarking {len(texts)} products")
+
+    torch_model = scraping.load_model("pytorch")
+    onnx_model = scraping.load_model("onnx-int8", args.threads)
+
+    torch_emb, torch_rate = time_encode(torch_model, texts, args.repeats)
+    onnx_emb, onnx_rate = time_encode(onnx_model, texts, args.repeats)
+
+    cosine = np.sum(np.asarray(torch_emb) * onnx_emb, axis=1)
+    print(f"pytorch:   {torch_rate:8.1f} texts/s")
+    print(f"onnx-int8: {onnx_rate:8.1f} texts/s  ({onnx_rate / torch_rate:.2f}x)")
+    print(f"Embedding cosine similarity: mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+
+    torch_df = scraping.clean_df(df.copy(), "pytorch")
+    onnx_df = scraping.clean_df(df.copy(), "onnx-int8", args.threads)
+    # Cluster ID 0 means "unmatched"; drop rows unmatched under both backends
+    # and give the rest unique labels so they don't count as one big cluster
+    torch_ids = torch_df["Cluster ID"]
+    onnx_ids = onnx_df.loc[torch_df.index, "Cluster ID"]
+    matched = (torch_ids != 0) | (onnx_ids != 0)
+    torch_ids, onnx_ids = torch_ids[matched], onnx_ids[matched]
+
+    def unique_unmatched(ids):
+        return [cid if cid != 0 else f"unmatched_{i}" for i, cid in zip(ids.index, ids)]
+
+    ari = adjusted_rand_score(unique_unmatched(torch_ids), unique_unmatched(onnx_ids))
+    print(f"Cluster agreement (adjusted Rand index): {ari:.4f}")
+
+    if ari < args.tolerance:
+        print(f"FAIL: cluster agreement below tolerance {args.tolerance}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from anyio import Semaphore
 from openai import timeout
 import requests, asyncio, aiohttp
 import re
+import zlib
 import pandas as pd
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
@@ -10,6 +11,7 @@ import networkx as nx
 import numpy as np
 import streamlit as st
 from sentence_transformers import SentenceTransformer, util
+from embeddings import OnnxSentenceEncoder
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -161,11 +163,114 @@ def parse_product(product, domain, handle, brand):
         product_rows.append(item)
     return product_rows
 
+EMBEDDING_BACKENDS = ["pytorch", "onnx-int8"]
+
 @st.cache_resource
-def load_model():
+def load_model(backend="pytorch", num_threads=None):
+    if backend == "onnx-int8":
+        return OnnxSentenceEncoder(num_threads=num_threads)
     return SentenceTransformer("all-MiniLM-L6-v2")
 
 
+# --- Near-Duplicate Pre-Filter (MinHash / LSH) ---
+
+MINHASH_PRIME = np.uint64((1 << 31) - 1)
+
+
+def shingle_text(text, k=5):
+    text = " ".join(str(text).lower().split())
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def minhash_signatures(texts, num_perm=64, seed=42):
+    # Universal hashing (a * x + b) mod p over crc32 shingle hashes.
+    # crc32 < 2^32 and a < 2^31, so the product fits in uint64.
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingle_text(text)),
+            dtype=np.uint64
+        )
+        signatures[row] = ((hashes[:, None] * a + b) % MINHASH_PRIME).min(axis=0)
+
+    return signatures
+
+
+def near_duplicate_groups(texts, bands=16, rows=4, min_similarity=0.85):
+    """
+    Groups exact and near-exact duplicate texts using MinHash + LSH banding.
+    Only texts that differ by a few characters (casing, whitespace, a size
+    or colour word in a long description) reach min_similarity; short
+    titles that differ by a whole word are left to the dense clustering.
+    Returns a list of groups (lists of positional indices); the first index
+    of each group is used as its representative.
+    """
+    # Collapse identical normalised texts first so exact duplicates are
+    # hashed and compared once
+    unique_members = {}
+    for i, text in enumerate(texts):
+        unique_members.setdefault(" ".join(str(text).lower().split()), []).append(i)
+    unique_texts = list(unique_members)
+
+    signatures = minhash_signatures(unique_texts, num_perm=bands * rows)
+
+    # Union-find over unique texts
+    parent = list(range(len(unique_texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Identical signatures are already the same set
+    seen_signatures = {}
+    for i, sig in enumerate(signatures):
+        first = seen_signatures.setdefault(sig.tobytes(), i)
+        if first != i:
+            parent[find(i)] = find(first)
+
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        band_slice = signatures[:, band * rows:(band + 1) * rows]
+        for i, band_sig in enumerate(band_slice):
+            buckets.setdefault(band_sig.tobytes(), []).append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+
+            # One member per set; pairs already in the same set are skipped
+            reps = list({find(m): m for m in members}.values())
+            while len(reps) > 1:
+                first, others = reps[0], reps[1:]
+                others = [o for o in others if (first, o) not in checked]
+                checked.update((first, o) for o in others)
+                if not others:
+                    reps = reps[1:]
+                    continue
+
+                # Estimated Jaccard similarity over the full signature, one array op per bucket
+                similarity = (signatures[others] == signatures[first]).mean(axis=1)
+                merged = {o for o, sim in zip(others, similarity) if sim >= min_similarity}
+                for o in merged:
+                    parent[find(o)] = find(first)
+                reps = [o for o in reps[1:] if o not in merged]
+
+    groups = {}
+    for u, members in enumerate(unique_members.values()):
+        groups.setdefault(find(u), []).extend(members)
+
+    return sorted((sorted(group) for group in groups.values()), key=lambda group: group[0])
+
+
 def assign_product_category(row):
     title = str(row["Product"]).lower()
     desc = str(row["Description"]).lower()
@@ -248,7 +353,7 @@ def assign_product_category(row):
     return best_cat, ", ".join(triggers[best_cat])
 
 
-def clean_df(df):
+def clean_df(df, backend="pytorch", num_threads=None):
     if df.empty:
         return df
 
@@ -267,7 +372,7 @@ def clean_df(df):
 
     df["Cluster ID"] = "unmatched"
 
-    model = load_model()
+    model = load_model(backend, num_threads)
     threshold = 0.7
     k_neighbors = 3
 
@@ -280,29 +385,39 @@ def clean_df(df):
         if len(df_cat) < 2:
             continue
 
-        embeddings = model.encode(
-            list(df_cat["Canonical Text"]),
-            normalize_embeddings=True
-        )
+        # Collapse near-duplicates (colourways, sizes) so only one
+        # representative per group is embedded and compared
+        groups = near_duplicate_groups(list(df_cat["Canonical Text"]))
+        rep_texts = [df_cat["Canonical Text"].iloc[group[0]] for group in groups]
+
+        if len(rep_texts) >= 2:
+            embeddings = model.encode(
+                rep_texts,
+                normalize_embeddings=True
+            )
 
-        sim_matrix = util.cos_sim(embeddings, embeddings).numpy()
+            sim_matrix = util.cos_sim(embeddings, embeddings).numpy()
 
-        graph = nx.Graph()
-        graph.add_nodes_from(range(len(df_cat)))
+            graph = nx.Graph()
+            graph.add_nodes_from(range(len(rep_texts)))
 
-        for i in range(len(sim_matrix)):
-            indices = np.argsort(sim_matrix[i])[-(k_neighbors + 1):-1]
+            for i in range(len(sim_matrix)):
+                indices = np.argsort(sim_matrix[i])[-(k_neighbors + 1):-1]
 
-            for idx in indices:
-                if sim_matrix[i][idx] >= threshold:
-                    graph.add_edge(i, idx)
+                for idx in indices:
+                    if sim_matrix[i][idx] >= threshold:
+                        graph.add_edge(i, idx)
 
-        clusters = list(nx.connected_components(graph))
+            clusters = list(nx.connected_components(graph))
+        else:
+            clusters = [{0}]
 
         for cluster in clusters:
-            if len(cluster) >= 2:
+            # Spread the representative's cluster back to all group members
+            members = [m for rep in cluster for m in groups[rep]]
+            if len(members) >= 2:
                 global_cluster_counter += 1
-                original_indices = df_cat.index[list(cluster)]
+                original_indices = df_cat.index[members]
                 df.loc[original_indices, "Cluster ID"] = f"temp_{global_cluster_counter}"
 
     clustered_items = df[df["Cluster ID"] != "unmatched"]